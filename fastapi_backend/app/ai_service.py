@@ -1,23 +1,35 @@
-import os
-from typing import List, Dict, Any, Optional
+import asyncio
+from functools import cached_property
+from typing import List, Dict, Any, Optional, Tuple
+import orjson
+from openai import AsyncOpenAI
 from .config import settings
 from .file_service import file_service
+from .semantic_cache import semantic_cache
 
 
 class AIService:
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
-        self.client = None
         self.model = "gpt-4o-mini"  # Using GPT-4o-mini for cost efficiency
+        # Caps in-flight OpenAI requests from batch calls to stay under rate limits
+        self.batch_semaphore = asyncio.Semaphore(10)
 
-        if self.api_key:
-            try:
-                from openai import OpenAI
+    @cached_property
+    def client(self) -> Optional[AsyncOpenAI]:
+        """
+        OpenAI client, created on first use so importing the service stays cheap.
+        """
+        return AsyncOpenAI(api_key=self.api_key) if self.api_key else None
 
-                self.client = OpenAI(api_key=self.api_key)
-            except ImportError:
-                print("OpenAI package not installed. Install with: pip install openai")
-                self.client = None
+    async def close(self) -> None:
+        """
+        Close the underlying HTTP connection pool of the OpenAI client.
+        """
+        # Only close a client that was actually created
+        client = self.__dict__.get("client")
+        if client:
+            await client.close()
 
     async def generate_doc_suggestions(
         self, query: str, doc_content: Optional[str] = None
@@ -37,8 +49,22 @@ class AIService:
             return self._get_fallback_suggestions(query)
 
         try:
-            # Get relevant documentation sections
-            relevant_sections = file_service.find_relevant_sections(query)
+            # Embedding the query and syncing with the docs tree are blocking,
+            # run them in a worker thread
+            query_embedding, docs_version = await asyncio.to_thread(
+                self._prepare_query, query
+            )
+
+            # Serve paraphrases of previously answered queries from the cache,
+            # as long as the docs have not changed since they were answered
+            cached_suggestions = semantic_cache.lookup(query_embedding, docs_version)
+            if cached_suggestions is not None:
+                return cached_suggestions
+
+            # Only rank sections on a cache miss
+            relevant_sections, section_file_map = await asyncio.to_thread(
+                self._gather_context, query, query_embedding
+            )
 
             # Build context from relevant sections
             context = self._build_context(relevant_sections)
@@ -53,7 +79,7 @@ class AIService:
             - The rationale for the change
             - The file path where the change should be made (if you can determine it)
             
-            Format your response as a JSON array of objects with these fields:
+            Format your response as a JSON object with a "suggestions" key holding an array of objects with these fields:
             - id: unique identifier (number)
             - section: the section name or area
             - suggestion: detailed description of the suggested change
@@ -72,7 +98,7 @@ class AIService:
             Focus on the most relevant sections and provide specific, actionable recommendations.
             """
 
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -80,6 +106,7 @@ class AIService:
                 ],
                 temperature=0.3,
                 max_tokens=1000,
+                response_format={"type": "json_object"},
             )
 
             # Parse the response
@@ -88,7 +115,13 @@ class AIService:
 
             # Enhance suggestions with file paths if available
             suggestions = self._enhance_suggestions_with_files(
-                suggestions, relevant_sections
+                suggestions, relevant_sections, section_file_map
+            )
+
+            # Only parsed model output reaches this point, fallbacks are never cached.
+            # Saving the cache pickles it to disk, keep it off the event loop too.
+            await asyncio.to_thread(
+                semantic_cache.add, query_embedding, suggestions, docs_version
             )
 
             return suggestions
@@ -98,6 +131,48 @@ class AIService:
             # Return fallback suggestions
             return self._get_fallback_suggestions(query)
 
+    async def generate_doc_suggestions_batch(
+        self, queries: List[str]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Generate suggestions for several queries concurrently.
+
+        Args:
+            queries: User's natural language queries
+
+        Returns:
+            One list of suggestion dictionaries per query, in the same order
+        """
+
+        async def generate(query: str) -> List[Dict[str, Any]]:
+            async with self.batch_semaphore:
+                return await self.generate_doc_suggestions(query)
+
+        return await asyncio.gather(*(generate(query) for query in queries))
+
+    def _prepare_query(self, query: str) -> Tuple[Any, str]:
+        """
+        Embed the query and sync with the docs directory in one blocking call.
+        Meant to be run in a worker thread.
+
+        Returns:
+            The query embedding (None when disabled) and the docs version
+        """
+        return semantic_cache.embed(query), file_service.get_docs_version()
+
+    def _gather_context(
+        self, query: str, query_embedding: Any
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Collect the docs context of a query in one blocking call.
+        Meant to be run in a worker thread.
+
+        Returns:
+            The relevant sections and the section title to file map
+        """
+        relevant_sections = file_service.find_relevant_sections(query, query_embedding)
+        return relevant_sections, file_service.get_section_file_map()
+
     def _build_context(self, relevant_sections: List[Dict[str, Any]]) -> str:
         """
         Build context string from relevant sections.
@@ -111,89 +186,54 @@ class AIService:
             section = item["section"]
             context_parts.append(f"File: {file_path}")
             context_parts.append(f"Section: {section['title']}")
-            context_parts.append(
-                f"Content: {section['content'][:200]}..."
-            )  # Truncate for token efficiency
+            # Preview is truncated at parse time for token efficiency
+            context_parts.append(f"Content: {section['preview']}...")
             context_parts.append("---")
 
         return "\n".join(context_parts)
 
     def _enhance_suggestions_with_files(
-        self, suggestions: List[Dict[str, Any]], relevant_sections: List[Dict[str, Any]]
+        self,
+        suggestions: List[Dict[str, Any]],
+        relevant_sections: List[Dict[str, Any]],
+        section_to_file: Dict[str, str],
     ) -> List[Dict[str, Any]]:
         """
-        Enhance suggestions with file paths from relevant sections.
+        Enhance suggestions with file paths of the sections they refer to.
+        Titles are resolved against the sections sent as context first, most
+        relevant first, so a generic title like "Installation" maps to the
+        file the model was shown rather than its first file in the docs tree.
         """
-        # Create a mapping of section titles to file paths
-        section_to_file = {}
+        context_to_file = {}
         for item in relevant_sections:
-            section_to_file[item["section"]["title"].lower()] = item["file_path"]
+            context_to_file.setdefault(
+                item["section"]["title"].casefold(), item["file_path"]
+            )
 
         for suggestion in suggestions:
-            section_title = suggestion.get("section", "").lower()
-            if section_title in section_to_file and not suggestion.get("file_path"):
-                suggestion["file_path"] = section_to_file[section_title]
+            if suggestion.get("file_path"):
+                continue
+
+            section_title = (suggestion.get("section") or "").casefold()
+            file_path = context_to_file.get(section_title) or section_to_file.get(
+                section_title
+            )
+            if file_path:
+                suggestion["file_path"] = file_path
 
         return suggestions
 
     def _parse_suggestions(self, content: str) -> List[Dict[str, Any]]:
         """
         Parse the AI response into structured suggestions.
+        The model runs in JSON mode, so the content is a strict JSON object.
+        Raises ValueError when the response does not hold a suggestions list.
         """
-        try:
-            # Try to extract JSON from the response
-            import json
-            import re
+        suggestions = orjson.loads(content).get("suggestions")
+        if not isinstance(suggestions, list):
+            raise ValueError("Response has no suggestions list")
 
-            # Look for JSON in the response
-            json_match = re.search(r"\[.*\]", content, re.DOTALL)
-            if json_match:
-                suggestions = json.loads(json_match.group())
-                return suggestions
-
-            # If no JSON found, create structured suggestions from text
-            return self._parse_text_suggestions(content)
-
-        except Exception as e:
-            print(f"Error parsing suggestions: {e}")
-            return self._get_fallback_suggestions("general update")
-
-    def _parse_text_suggestions(self, content: str) -> List[Dict[str, Any]]:
-        """
-        Parse text-based suggestions when JSON parsing fails.
-        """
-        suggestions = []
-        lines = content.split("\n")
-        current_suggestion = None
-
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if line.startswith(("1.", "2.", "3.", "4.", "5.")) or line.startswith("-"):
-                if current_suggestion:
-                    suggestions.append(current_suggestion)
-
-                current_suggestion = {
-                    "id": len(suggestions) + 1,
-                    "section": "General",
-                    "suggestion": (
-                        line[line.find(".") + 1 :].strip()
-                        if "." in line
-                        else line[1:].strip()
-                    ),
-                    "file_path": None,
-                    "line_number": None,
-                }
-            elif current_suggestion and line:
-                current_suggestion["suggestion"] += " " + line
-
-        if current_suggestion:
-            suggestions.append(current_suggestion)
-
-        return (
-            suggestions
-            if suggestions
-            else self._get_fallback_suggestions("general update")
-        )
+        return suggestions
 
     def _get_fallback_suggestions(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -40,6 +40,10 @@ class Settings(BaseSettings):
 
     # OpenAI
     OPENAI_API_KEY: str | None = None
+    SEMANTIC_CACHE_PATH: str = "semantic_cache.pkl"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.9
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+    SEMANTIC_SEARCH_MIN_SIMILARITY: float = 0.3
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -0,0 +1,62 @@
+import threading
+from typing import List
+
+
+class EmbeddingModel:
+    """
+    Sentence embedding model shared by the semantic cache and section search.
+    The model is loaded on first use, so importing the app never downloads it.
+    Disabled when sentence-transformers is not installed or fails to load.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self.model = None
+        self.np = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            try:
+                import numpy as np
+                from sentence_transformers import SentenceTransformer
+
+                self.model = SentenceTransformer(self.model_name)
+                self.np = np
+            except ImportError:
+                print(
+                    "sentence-transformers package not installed. Semantic search disabled. "
+                    "Install with: pip install sentence-transformers"
+                )
+            except Exception as e:
+                # e.g. an OSError when the model cannot be downloaded
+                print(
+                    f"Error loading embedding model {self.model_name}: {e}. "
+                    "Semantic search disabled."
+                )
+            self._loaded = True
+
+    @property
+    def enabled(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self.model is not None
+
+    def encode(self, texts: List[str]):
+        """
+        Return L2-normalized float32 embeddings of shape (len(texts), d),
+        or None when disabled.
+        """
+        if not self.enabled:
+            return None
+
+        embeddings = self.model.encode(texts, normalize_embeddings=True)
+        return embeddings.astype(self.np.float32)
+
+
+# Global embedding model instance
+embedding_model = EmbeddingModel()
@@ -1,206 +1,496 @@
-import os
-import shutil
+import heapq
+import hashlib
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import re
+from array import array
+from collections import Counter, defaultdict
 from datetime import datetime
 
+import orjson
+
+from .config import settings
+from .embeddings import EmbeddingModel, embedding_model
+
+# Markdown ATX headers (h1-h6), matched line by line across the whole file.
+# The separator excludes newlines so a header never spans two lines.
+HEADER_REGEX_PATTERN = re.compile(r"^(#{1,6})[^\S\n]+(.+)$", re.MULTILINE)
+# Word tokens used to build and query the section index
+TOKEN_REGEX_PATTERN = re.compile(r"\w+")
+
 
 class FileService:
-    def __init__(self, docs_root: str = "docs"):
+    def __init__(
+        self,
+        docs_root: str = "docs",
+        embedding_model: Optional[EmbeddingModel] = None,
+        min_similarity: float = 0.3,
+    ):
         self.docs_root = Path(docs_root)
+        self.embedding_model = embedding_model
+        # Sections below this cosine similarity to the query are never relevant
+        self.min_similarity = min_similarity
         self.backup_dir = Path("backups")
         self.backup_dir.mkdir(exist_ok=True)
+        # Append-only JSON Lines log, one entry per backup taken
+        self.backup_index_path = self.backup_dir / "index.jsonl"
+        # Parsed files keyed by path, tagged with the (mtime_ns, size) they were parsed at.
+        # File entries hold only metadata and sections, not the full file text.
+        # The last item holds the file's section embeddings once encoded, so
+        # only re-parsed files are encoded again when the index is rebuilt.
+        self._file_cache: Dict[Path, Tuple[int, int, Dict[str, Any], Any]] = {}
+        self._files: List[Dict[str, Any]] = []
+        # (mtime_ns, size) of files that failed to read or parse, skipped
+        # until they change so one bad file does not force a rebuild per query
+        self._failed_files: Dict[Path, Tuple[int, int]] = {}
+        # Section store as parallel arrays indexed by section id, plus the
+        # token -> section id postings, rebuilt lazily whenever the files change.
+        # The postings stay empty while embeddings rank the sections.
+        self._section_file_paths: List[str] = []
+        self._sections: List[Dict[str, Any]] = []
+        self._index: Optional[Dict[str, array]] = None
+        # L2-normalized "title + preview" embeddings, one row per section id,
+        # or None when no embedding model is available
+        self._section_embeddings = None
+        # Casefolded section title -> file path of its first occurrence,
+        # in file path order
+        self._title_to_file: Dict[str, str] = {}
+        # Fingerprint of the (path, mtime_ns, size) of every doc file, changes
+        # whenever a file is added, edited or removed
+        self.docs_version = ""
+        # Methods are run in worker threads from async routes: one lock guards
+        # the in-memory store, another serializes file writes and backups
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._refresh()
 
     def get_documentation_files(self) -> List[Dict[str, Any]]:
         """
         Get all documentation files in the docs directory.
         """
-        files = []
-        if not self.docs_root.exists():
-            return files
+        with self._lock:
+            self._refresh()
+            return self._files
 
-        for file_path in self.docs_root.rglob("*.md"):
-            try:
-                content = file_path.read_text(encoding="utf-8")
-                files.append(
-                    {
+    def _refresh(self) -> None:
+        """
+        Sync the in-memory file store with the docs directory.
+        Files are only re-read and re-parsed when their mtime or size changed.
+        """
+        file_cache = {}
+        failed_files = {}
+        changed = False
+
+        if self.docs_root.exists():
+            for file_path in self.docs_root.rglob("*.md"):
+                try:
+                    stat = file_path.stat()
+                    cached = self._file_cache.get(file_path)
+                    if (
+                        cached
+                        and cached[0] == stat.st_mtime_ns
+                        and cached[1] == stat.st_size
+                    ):
+                        # Unchanged, keep its parsed sections and embeddings
+                        file_cache[file_path] = cached
+                        continue
+
+                    file_stamp = (stat.st_mtime_ns, stat.st_size)
+                    if self._failed_files.get(file_path) == file_stamp:
+                        failed_files[file_path] = file_stamp
+                        continue
+                except Exception as e:
+                    print(f"Error reading file {file_path}: {e}")
+                    continue
+
+                try:
+                    content = file_path.read_text(encoding="utf-8")
+                    file_info = {
                         "path": str(file_path.relative_to(self.docs_root)),
                         "name": file_path.name,
-                        "content": content,
                         "sections": self._extract_sections(content),
                         "size": len(content),
                     }
-                )
-            except Exception as e:
-                print(f"Error reading file {file_path}: {e}")
+                except Exception as e:
+                    print(f"Error reading file {file_path}: {e}")
+                    failed_files[file_path] = file_stamp
+                    continue
 
-        return files
+                changed = True
+                file_cache[file_path] = (*file_stamp, file_info, None)
+
+        self._failed_files = failed_files
+
+        # Rebuilt on every walk so deleted files drop out of the store.
+        # Sorted by path, as rglob order is filesystem dependent.
+        if changed or file_cache.keys() != self._file_cache.keys():
+            file_cache = dict(
+                sorted(file_cache.items(), key=lambda item: item[1][2]["path"])
+            )
+            self._files = [file_info for _, _, file_info, _ in file_cache.values()]
+            self._index = None
+            self.docs_version = hashlib.sha256(
+                orjson.dumps(
+                    [
+                        (str(path), mtime_ns, size)
+                        for path, (mtime_ns, size, _, _) in file_cache.items()
+                    ]
+                )
+            ).hexdigest()
+            self._file_cache = file_cache
 
     def _extract_sections(self, content: str) -> List[Dict[str, Any]]:
         """
         Extract sections from markdown content.
+        Sections are sliced between header matches, without splitting the
+        content into lines.
         """
         sections = []
-        lines = content.split("\n")
         current_section = None
-        current_content = []
-
-        for i, line in enumerate(lines, 1):
-            # Check for headers (h1-h6)
-            header_match = re.match(r"^(#{1,6})\s+(.+)$", line)
-
-            if header_match:
-                # Save previous section
-                if current_section:
-                    current_section["content"] = "\n".join(current_content).strip()
-                    current_section["end_line"] = i - 1
-                    sections.append(current_section)
-
-                # Start new section
-                level = len(header_match.group(1))
-                title = header_match.group(2).strip()
-                current_section = {
-                    "title": title,
-                    "level": level,
-                    "start_line": i,
-                    "content": "",
-                    "end_line": None,
-                }
-                current_content = []
-            else:
-                current_content.append(line)
+        content_start = 0
+        line_number = 1
+        line_pos = 0
+
+        for header_match in HEADER_REGEX_PATTERN.finditer(content):
+            # Advance the line counter to the header line
+            line_number += content.count("\n", line_pos, header_match.start())
+            line_pos = header_match.start()
+
+            # Save previous section
+            if current_section:
+                section_content = content[content_start : header_match.start()]
+                current_section["content"] = section_content.strip()
+                current_section["preview"] = current_section["content"][:200]
+                current_section["end_line"] = line_number - 1
+                sections.append(current_section)
+
+            # Start new section
+            current_section = {
+                "title": header_match.group(2).strip(),
+                "level": len(header_match.group(1)),
+                "start_line": line_number,
+                "content": "",
+                "preview": "",
+                "end_line": None,
+            }
+            content_start = header_match.end()
 
         # Add the last section
         if current_section:
-            current_section["content"] = "\n".join(current_content).strip()
-            current_section["end_line"] = len(lines)
+            current_section["content"] = content[content_start:].strip()
+            current_section["preview"] = current_section["content"][:200]
+            current_section["end_line"] = content.count("\n") + 1
             sections.append(current_section)
 
         return sections
 
-    def find_relevant_sections(self, query: str) -> List[Dict[str, Any]]:
+    def _build_index(self) -> None:
         """
-        Find sections that might be relevant to the user's query.
+        Build the section store, and the inverted index mapping lowercased
+        word tokens to sections when keywords rank the sections.
         """
-        relevant_sections = []
-        files = self.get_documentation_files()
-
-        # Simple keyword matching (could be enhanced with embeddings)
-        query_lower = query.lower()
-        keywords = query_lower.split()
+        use_embeddings = bool(self.embedding_model and self.embedding_model.enabled)
+        section_file_paths = []
+        sections = []
+        title_to_file = {}
+        # Postings are compact unsigned int arrays of section ids
+        index = defaultdict(lambda: array("I"))
 
-        for file_info in files:
+        for _, _, file_info, _ in self._file_cache.values():
             for section in file_info["sections"]:
+                section_idx = len(sections)
+                section_file_paths.append(file_info["path"])
+                sections.append(section)
+                title_to_file.setdefault(section["title"].casefold(), file_info["path"])
+                if use_embeddings:
+                    continue
                 section_text = f"{section['title']} {section['content']}".lower()
-                relevance_score = sum(
-                    1 for keyword in keywords if keyword in section_text
+                for token in set(TOKEN_REGEX_PATTERN.findall(section_text)):
+                    index[token].append(section_idx)
+
+        self._section_file_paths = section_file_paths
+        self._sections = sections
+        self._index = dict(index)
+        self._title_to_file = title_to_file
+
+        self._section_embeddings = None
+        if use_embeddings and sections:
+            self._section_embeddings = self._encode_sections()
+
+    def _encode_sections(self):
+        """
+        Return the section embeddings in section id order, encoding only the
+        files that were re-parsed since their embeddings were last computed.
+        """
+        stale_paths = [
+            file_path
+            for file_path, (_, _, file_info, embeddings) in self._file_cache.items()
+            if embeddings is None and file_info["sections"]
+        ]
+        if stale_paths:
+            texts = [
+                f"{section['title']}\n{section['preview']}"
+                for file_path in stale_paths
+                for section in self._file_cache[file_path][2]["sections"]
+            ]
+            encoded = self.embedding_model.encode(texts)
+            offset = 0
+            for file_path in stale_paths:
+                mtime_ns, size, file_info, _ = self._file_cache[file_path]
+                count = len(file_info["sections"])
+                self._file_cache[file_path] = (
+                    mtime_ns,
+                    size,
+                    file_info,
+                    encoded[offset : offset + count],
                 )
+                offset += count
 
-                if relevance_score > 0:
-                    relevant_sections.append(
-                        {
-                            "file_path": file_info["path"],
-                            "section": section,
-                            "relevance_score": relevance_score,
-                            "content": file_info["content"],
-                        }
-                    )
+        return self.embedding_model.np.vstack(
+            [
+                embeddings
+                for _, _, file_info, embeddings in self._file_cache.values()
+                if file_info["sections"]
+            ]
+        )
+
+    def get_docs_version(self) -> str:
+        """
+        Sync with the docs directory and return the current docs version.
+        """
+        with self._lock:
+            self._refresh()
+            return self.docs_version
+
+    def get_section_file_map(self) -> Dict[str, str]:
+        """
+        Map casefolded section titles to the file that contains them,
+        as of the last sync with the docs directory.
+        """
+        with self._lock:
+            if self._index is None:
+                self._build_index()
+
+            return self._title_to_file
+
+    def find_relevant_sections(
+        self, query: str, query_embedding=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find sections that might be relevant to the user's query.
+        Sections are ranked by embedding similarity when an embedding model is
+        available, and by keyword matches otherwise.
+        """
+        with self._lock:
+            self._refresh()
+            if self._index is None:
+                self._build_index()
+
+            if self._section_embeddings is not None:
+                return self._find_similar_sections(query, query_embedding)
+
+            return self._find_keyword_sections(query)
+
+    def _find_keyword_sections(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Rank sections by how many of the query keywords they contain.
+        """
+        keywords = TOKEN_REGEX_PATTERN.findall(query.lower())
+
+        # Each keyword adds one point to every section containing it;
+        # Counter.update tallies a whole postings array in C
+        scores = Counter()
+        for keyword in keywords:
+            scores.update(self._index.get(keyword, ()))
+
+        # Top 10 by relevance score, ties keep document order
+        top_indices = heapq.nlargest(
+            10, scores, key=lambda section_idx: (scores[section_idx], -section_idx)
+        )
+
+        relevant_sections = []
+        for section_idx in top_indices:
+            relevant_sections.append(
+                {
+                    "file_path": self._section_file_paths[section_idx],
+                    "section": self._sections[section_idx],
+                    "relevance_score": scores[section_idx],
+                }
+            )
+
+        return relevant_sections
 
-        # Sort by relevance score
-        relevant_sections.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return relevant_sections[:10]  # Return top 10 most relevant
+    def _find_similar_sections(
+        self, query: str, query_embedding=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank sections by cosine similarity between their embedding and the query's.
+        Sections below min_similarity are left out, so an unrelated query finds
+        nothing, as in keyword mode.
+        """
+        np = self.embedding_model.np
+        if query_embedding is None:
+            query_embedding = self.embedding_model.encode([query])[0]
+
+        # Rows are normalized, so the dot product is the cosine similarity
+        scores = self._section_embeddings @ query_embedding
+        candidates = np.flatnonzero(scores >= self.min_similarity)
+        if not len(candidates):
+            return []
+
+        # Top 10 without sorting every score, then order just those
+        top_k = min(10, len(candidates))
+        top_indices = candidates[
+            np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        ]
+        top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
+
+        return [
+            {
+                "file_path": self._section_file_paths[section_idx],
+                "section": self._sections[section_idx],
+                "relevance_score": float(scores[section_idx]),
+            }
+            for section_idx in top_indices
+        ]
 
     def apply_suggestions(self, suggestions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Apply approved suggestions to documentation files.
+        Suggestions are grouped by file so each file is backed up, read and
+        written once no matter how many suggestions target it.
         """
+        with self._write_lock:
+            return self._apply_suggestions(suggestions)
+
+    def _apply_suggestions(self, suggestions: List[Dict[str, Any]]) -> Dict[str, Any]:
         results = {"success": [], "errors": [], "backups": []}
 
+        suggestions_by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for suggestion in suggestions:
-            try:
-                file_path = suggestion.get("file_path")
-                if not file_path:
-                    results["errors"].append(
-                        {
-                            "suggestion_id": suggestion.get("id"),
-                            "error": "No file path specified",
-                        }
-                    )
-                    continue
+            file_path = suggestion.get("file_path")
+            if not file_path:
+                results["errors"].append(
+                    {
+                        "suggestion_id": suggestion.get("id"),
+                        "error": "No file path specified",
+                    }
+                )
+                continue
+
+            suggestions_by_file[file_path].append(suggestion)
 
-                full_path = self.docs_root / file_path
-                if not full_path.exists():
+        for file_path, file_suggestions in suggestions_by_file.items():
+            full_path = self.docs_root / file_path
+            if not full_path.exists():
+                for suggestion in file_suggestions:
                     results["errors"].append(
                         {
                             "suggestion_id": suggestion.get("id"),
                             "error": f"File not found: {file_path}",
                         }
                     )
-                    continue
+                continue
 
-                # Create backup
-                backup_path = self._create_backup(full_path)
+            try:
+                # Read once: the same bytes are hashed for the backup and
+                # decoded for the edits
+                data = full_path.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                backup_path = self._create_backup(full_path, data, digest)
                 results["backups"].append(str(backup_path))
 
-                # Apply the change
-                success = self._apply_single_suggestion(full_path, suggestion)
-
-                if success:
-                    results["success"].append(
-                        {
-                            "suggestion_id": suggestion.get("id"),
-                            "file_path": file_path,
-                            "message": "Successfully applied",
-                        }
+                content = data.decode("utf-8")
+            except Exception as e:
+                for suggestion in file_suggestions:
+                    results["errors"].append(
+                        {"suggestion_id": suggestion.get("id"), "error": str(e)}
+                    )
+                continue
+
+            # Apply all changes for this file in memory
+            applied = []
+            for suggestion in file_suggestions:
+                try:
+                    content = self._apply_suggestion_to_content(content, suggestion)
+                    applied.append(suggestion)
+                except Exception as e:
+                    results["errors"].append(
+                        {"suggestion_id": suggestion.get("id"), "error": str(e)}
                     )
-                else:
+
+            if not applied:
+                continue
+
+            try:
+                full_path.write_text(content, encoding="utf-8")
+            except Exception as e:
+                print(f"Error applying suggestions to {full_path}: {e}")
+                for suggestion in applied:
                     results["errors"].append(
                         {
                             "suggestion_id": suggestion.get("id"),
                             "error": "Failed to apply suggestion",
                         }
                     )
+                continue
 
-            except Exception as e:
-                results["errors"].append(
-                    {"suggestion_id": suggestion.get("id"), "error": str(e)}
+            for suggestion in applied:
+                results["success"].append(
+                    {
+                        "suggestion_id": suggestion.get("id"),
+                        "file_path": file_path,
+                        "message": "Successfully applied",
+                    }
                 )
 
         return results
 
-    def _create_backup(self, file_path: Path) -> Path:
+    def _create_backup(self, file_path: Path, data: bytes, digest: str) -> Path:
         """
         Create a backup of the file before making changes.
+        Backups are content-addressed by the SHA-256 digest of the file's
+        bytes, so an unchanged file is only recorded in the backup index
+        instead of being copied again.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
-        backup_path = self.backup_dir / backup_name
-
-        shutil.copy2(file_path, backup_path)
+        backup_path = self.backup_dir / digest[:2] / f"{digest}{file_path.suffix}"
+
+        if not backup_path.exists():
+            backup_path.parent.mkdir(exist_ok=True)
+            backup_path.write_bytes(data)
+
+        # Appending one line keeps each backup O(1) however long the log is
+        entry = {
+            "created": datetime.now().isoformat(),
+            "original_path": str(file_path),
+            "hash": digest,
+            "path": str(backup_path),
+        }
+        with self.backup_index_path.open("ab") as f:
+            f.write(orjson.dumps(entry) + b"\n")
         return backup_path
 
-    def _apply_single_suggestion(
-        self, file_path: Path, suggestion: Dict[str, Any]
-    ) -> bool:
+    def _load_backup_index(self) -> List[Dict[str, Any]]:
         """
-        Apply a single suggestion to a file.
+        Load the list of recorded backups from the backup index.
+        A line left partial by a crash mid-append is skipped.
         """
-        try:
-            content = file_path.read_text(encoding="utf-8")
-            lines = content.split("\n")
-
-            # For now, we'll append the suggestion as a comment
-            # This is a simple approach - could be enhanced with more sophisticated diffing
-            new_content = self._apply_suggestion_to_content(content, suggestion)
-
-            # Write the updated content
-            file_path.write_text(new_content, encoding="utf-8")
-            return True
+        if not self.backup_index_path.exists():
+            return []
 
+        backup_index = []
+        try:
+            with self.backup_index_path.open("rb") as f:
+                for line in f:
+                    try:
+                        backup_index.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        print(f"Skipping bad line in {self.backup_index_path}")
         except Exception as e:
-            print(f"Error applying suggestion to {file_path}: {e}")
-            return False
+            print(f"Error reading backup index {self.backup_index_path}: {e}")
+
+        return backup_index
 
     def _apply_suggestion_to_content(
         self, content: str, suggestion: Dict[str, Any]
@@ -234,17 +524,43 @@ class FileService:
     def list_backups(self) -> List[Dict[str, Any]]:
         """
         List all backup files.
+        Legacy "<stem>_<timestamp>" backups stored directly in the backup
+        directory, from before the backup index, are listed as well.
         """
+        with self._write_lock:
+            backup_index = self._load_backup_index()
+            legacy_files = [
+                backup_file
+                for backup_file in self.backup_dir.glob("*")
+                if backup_file.is_file()
+                and backup_file.name != self.backup_index_path.name
+            ]
+
         backups = []
-        for backup_file in self.backup_dir.glob("*"):
+        for backup_file in legacy_files:
+            stat = backup_file.stat()
+            backups.append(
+                {
+                    "name": backup_file.name,
+                    "size": stat.st_size,
+                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                    "path": str(backup_file),
+                    "original_path": None,
+                    "hash": None,
+                }
+            )
+
+        for entry in backup_index:
+            backup_file = Path(entry["path"])
             if backup_file.is_file():
-                stat = backup_file.stat()
                 backups.append(
                     {
                         "name": backup_file.name,
-                        "size": stat.st_size,
-                        "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                        "path": str(backup_file),
+                        "size": backup_file.stat().st_size,
+                        "created": entry["created"],
+                        "path": entry["path"],
+                        "original_path": entry["original_path"],
+                        "hash": entry["hash"],
                     }
                 )
 
@@ -252,4 +568,7 @@ class FileService:
 
 
 # Global file service instance
-file_service = FileService()
+file_service = FileService(
+    embedding_model=embedding_model,
+    min_similarity=settings.SEMANTIC_SEARCH_MIN_SIMILARITY,
+)
@@ -1,4 +1,7 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from .schemas import UserCreate, UserRead, UserUpdate
 from .users import auth_backend, fastapi_users, AUTH_URL_PATH
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,8 +9,19 @@ from .utils import simple_generate_unique_route_id
 from app.routes.items import router as items_router
 from app.routes.doc_updates import router as doc_updates_router
 from app.config import settings
+from app.ai_service import ai_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release the pooled OpenAI connections on shutdown
+    await ai_service.close()
+
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     generate_unique_id_function=simple_generate_unique_route_id,
     openapi_url=settings.OPENAPI_URL,
 )
@@ -1,8 +1,7 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
-import os
-import json
 from ..ai_service import ai_service
 from ..file_service import file_service
 
@@ -22,6 +21,11 @@ class DocSuggestion(BaseModel):
     line_number: Optional[int] = None
 
 
+class DocUpdateBatchQuery(BaseModel):
+    # Each query is a paid OpenAI call, cap how many one request can queue
+    queries: List[str] = Field(min_length=1, max_length=20)
+
+
 class DocUpdateRequest(BaseModel):
     suggestions: List[DocSuggestion]
 
@@ -31,6 +35,11 @@ class DocUpdateResponse(BaseModel):
     message: str
 
 
+class DocUpdateBatchResponse(BaseModel):
+    results: List[DocUpdateResponse]
+    message: str
+
+
 class ApplyResponse(BaseModel):
     message: str
     success: List[dict]
@@ -38,6 +47,25 @@ class ApplyResponse(BaseModel):
     backups: List[str]
 
 
+def _to_doc_suggestions(ai_suggestions: List[dict]) -> List[DocSuggestion]:
+    """
+    Convert AI service suggestion dictionaries to DocSuggestion objects.
+    """
+    suggestions = []
+    for i, suggestion in enumerate(ai_suggestions, 1):
+        suggestions.append(
+            DocSuggestion(
+                id=suggestion.get("id", i),
+                section=suggestion.get("section", "General"),
+                suggestion=suggestion.get("suggestion", ""),
+                file_path=suggestion.get("file_path"),
+                line_number=suggestion.get("line_number"),
+            )
+        )
+
+    return suggestions
+
+
 @router.post("/suggest", response_model=DocUpdateResponse)
 async def get_doc_suggestions(query: DocUpdateQuery):
     """
@@ -47,21 +75,33 @@ async def get_doc_suggestions(query: DocUpdateQuery):
         # Use AI service to generate suggestions
         ai_suggestions = await ai_service.generate_doc_suggestions(query.query)
 
-        # Convert to DocSuggestion objects
-        suggestions = []
-        for i, suggestion in enumerate(ai_suggestions, 1):
-            suggestions.append(
-                DocSuggestion(
-                    id=suggestion.get("id", i),
-                    section=suggestion.get("section", "General"),
-                    suggestion=suggestion.get("suggestion", ""),
-                    file_path=suggestion.get("file_path"),
-                    line_number=suggestion.get("line_number"),
-                )
-            )
-
         return DocUpdateResponse(
-            suggestions=suggestions, message="Suggestions generated successfully"
+            suggestions=_to_doc_suggestions(ai_suggestions),
+            message="Suggestions generated successfully",
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error generating suggestions: {str(e)}"
+        )
+
+
+@router.post("/suggest-batch", response_model=DocUpdateBatchResponse)
+async def get_doc_suggestions_batch(batch: DocUpdateBatchQuery):
+    """
+    Get AI-generated suggestions for several queries, generated concurrently.
+    """
+    try:
+        ai_results = await ai_service.generate_doc_suggestions_batch(batch.queries)
+
+        return DocUpdateBatchResponse(
+            results=[
+                DocUpdateResponse(
+                    suggestions=_to_doc_suggestions(ai_suggestions),
+                    message="Suggestions generated successfully",
+                )
+                for ai_suggestions in ai_results
+            ],
+            message=f"Generated suggestions for {len(ai_results)} queries",
         )
     except Exception as e:
         raise HTTPException(
@@ -76,20 +116,14 @@ async def apply_doc_updates(updates: DocUpdateRequest):
     """
     try:
         # Convert to dictionary format for file service
-        suggestions_dict = []
-        for suggestion in updates.suggestions:
-            suggestions_dict.append(
-                {
-                    "id": suggestion.id,
-                    "section": suggestion.section,
-                    "suggestion": suggestion.suggestion,
-                    "file_path": suggestion.file_path,
-                    "line_number": suggestion.line_number,
-                }
-            )
+        suggestions_dict = [
+            suggestion.model_dump() for suggestion in updates.suggestions
+        ]
 
-        # Apply suggestions using file service
-        results = file_service.apply_suggestions(suggestions_dict)
+        # Apply suggestions using file service, off the event loop
+        results = await asyncio.to_thread(
+            file_service.apply_suggestions, suggestions_dict
+        )
 
         return ApplyResponse(
             message=f"Applied {len(results['success'])} updates successfully",
@@ -107,7 +141,7 @@ async def list_documentation_files():
     List all documentation files available for updates.
     """
     try:
-        files = file_service.get_documentation_files()
+        files = await asyncio.to_thread(file_service.get_documentation_files)
         return {"files": files, "count": len(files)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing files: {str(e)}")
@@ -119,7 +153,7 @@ async def list_backups():
     List all backup files created during updates.
     """
     try:
-        backups = file_service.list_backups()
+        backups = await asyncio.to_thread(file_service.list_backups)
         return {"backups": backups, "count": len(backups)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing backups: {str(e)}")
@@ -0,0 +1,153 @@
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from .config import settings
+from .embeddings import EmbeddingModel, embedding_model
+
+
+class SemanticCache:
+    """
+    Cache of generated suggestions keyed by the embedding of the user query.
+
+    Paraphrased queries ("update the install docs" / "fix installation
+    documentation") land close together in embedding space, so a cosine
+    similarity above the threshold is served from the cache instead of
+    calling OpenAI again.
+
+    Entries are tied to the docs version they were generated against and the
+    cache is cleared as soon as the docs change. At most max_entries queries
+    are kept, the oldest are dropped first.
+    """
+
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        cache_path: str = "semantic_cache.pkl",
+        threshold: float = 0.9,
+        max_entries: int = 1000,
+    ):
+        self.model = model
+        self.cache_path = Path(cache_path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # L2-normalized query embeddings, shape (N, d), and the parallel
+        # list of suggestions generated for each of them
+        self.embeddings = None
+        self.entries: List[List[Dict[str, Any]]] = []
+        # Docs version the current entries were generated against
+        self.docs_version = ""
+        # add() is run in worker threads, serialize updates and saves
+        self._lock = threading.Lock()
+        # The persisted cache is loaded on first use, together with the model
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.model.enabled
+
+    def embed(self, query: str):
+        """
+        Return the L2-normalized embedding of the query, or None when disabled.
+        """
+        if not self.enabled:
+            return None
+
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+        return self.model.encode([query])[0]
+
+    def lookup(self, embedding, docs_version: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return cached suggestions for the nearest query above the threshold,
+        or None when the cache was built against another docs version.
+        """
+        # Snapshot the state, add() may swap it from a worker thread; a
+        # snapshot taken mid-swap has mismatched lengths and is a miss
+        embeddings, entries = self.embeddings, self.entries
+        if (
+            embedding is None
+            or embeddings is None
+            or len(embeddings) != len(entries)
+            or docs_version != self.docs_version
+        ):
+            return None
+
+        # Rows are normalized, so the dot product is the cosine similarity
+        scores = embeddings @ embedding
+        best = int(scores.argmax())
+        if scores[best] >= self.threshold:
+            return entries[best]
+
+        return None
+
+    def add(
+        self, embedding, suggestions: List[Dict[str, Any]], docs_version: str
+    ) -> None:
+        """
+        Store suggestions for a query embedding and persist the cache.
+        Entries from an older docs version are dropped first.
+        """
+        if embedding is None:
+            return
+
+        with self._lock:
+            if docs_version != self.docs_version or self.embeddings is None:
+                embeddings = embedding.reshape(1, -1)
+                entries = [suggestions]
+            else:
+                embeddings = self.model.np.vstack([self.embeddings, embedding])
+                entries = self.entries + [suggestions]
+
+            # Evict the oldest queries beyond the cap
+            if len(entries) > self.max_entries:
+                embeddings = embeddings[-self.max_entries :]
+                entries = entries[-self.max_entries :]
+
+            self.embeddings, self.entries = embeddings, entries
+            self.docs_version = docs_version
+            self._save()
+
+    def _load(self) -> None:
+        if not self.cache_path.exists():
+            return
+
+        try:
+            with self.cache_path.open("rb") as f:
+                data = pickle.load(f)
+            self.embeddings = data["embeddings"]
+            self.entries = data["entries"]
+            self.docs_version = data.get("docs_version", "")
+        except Exception as e:
+            print(f"Error loading semantic cache {self.cache_path}: {e}")
+
+    def _save(self) -> None:
+        try:
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with tmp_path.open("wb") as f:
+                pickle.dump(
+                    {
+                        "embeddings": self.embeddings,
+                        "entries": self.entries,
+                        "docs_version": self.docs_version,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"Error saving semantic cache {self.cache_path}: {e}")
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache(
+    embedding_model,
+    cache_path=settings.SEMANTIC_CACHE_PATH,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+)
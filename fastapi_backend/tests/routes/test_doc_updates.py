@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.ai_service import ai_service
+
+
+class TestDocUpdates:
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_suggest_batch(self, test_client, mocker):
+        """Test generating suggestions for several queries at once."""
+
+        async def fake_generate(query):
+            return [{"id": 1, "section": "General", "suggestion": f"Update {query}"}]
+
+        mock_generate = mocker.patch.object(
+            ai_service, "generate_doc_suggestions", side_effect=fake_generate
+        )
+
+        response = await test_client.post(
+            "/doc-updates/suggest-batch",
+            json={"queries": ["install docs", "usage docs"]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [result["suggestions"][0]["suggestion"] for result in results] == [
+            "Update install docs",
+            "Update usage docs",
+        ]
+        assert mock_generate.call_count == 2
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_suggest_batch_limits_concurrency(self, test_client, mocker):
+        """Test that the batch semaphore caps in-flight generations."""
+        in_flight = 0
+        peak_in_flight = 0
+
+        async def fake_generate(query):
+            nonlocal in_flight, peak_in_flight
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [{"id": 1, "section": "General", "suggestion": f"Update {query}"}]
+
+        mocker.patch.object(
+            ai_service, "generate_doc_suggestions", side_effect=fake_generate
+        )
+        mocker.patch.object(ai_service, "batch_semaphore", asyncio.Semaphore(3))
+
+        response = await test_client.post(
+            "/doc-updates/suggest-batch",
+            json={"queries": [f"query {i}" for i in range(10)]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["results"]) == 10
+        assert peak_in_flight == 3
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_suggest_batch_rejects_too_many_queries(self, test_client, mocker):
+        """Test that an oversized or empty batch is rejected before any generation."""
+        mock_generate = mocker.patch.object(ai_service, "generate_doc_suggestions")
+
+        too_many = await test_client.post(
+            "/doc-updates/suggest-batch",
+            json={"queries": [f"query {i}" for i in range(21)]},
+        )
+        empty = await test_client.post(
+            "/doc-updates/suggest-batch", json={"queries": []}
+        )
+
+        assert too_many.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert empty.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        mock_generate.assert_not_called()
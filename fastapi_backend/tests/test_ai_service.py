@@ -0,0 +1,68 @@
+import pytest
+
+from app.ai_service import AIService
+
+
+@pytest.fixture
+def mock_file_service(mocker):
+    mock_file_service = mocker.patch("app.ai_service.file_service")
+    mock_file_service.get_docs_version.return_value = "v1"
+    mock_file_service.find_relevant_sections.return_value = []
+    mock_file_service.get_section_file_map.return_value = {}
+    return mock_file_service
+
+
+@pytest.mark.asyncio(loop_scope="function")
+async def test_unparseable_response_is_not_cached(mocker, mock_file_service):
+    service = AIService()
+    response = mocker.Mock()
+    response.choices = [mocker.Mock(message=mocker.Mock(content="not json"))]
+    service.client = mocker.Mock()
+    service.client.chat.completions.create = mocker.AsyncMock(return_value=response)
+    mock_cache = mocker.patch("app.ai_service.semantic_cache")
+    mock_cache.lookup.return_value = None
+
+    suggestions = await service.generate_doc_suggestions("update install docs")
+
+    service.client.chat.completions.create.assert_awaited_once()
+    assert suggestions == service._get_fallback_suggestions("update install docs")
+    mock_cache.add.assert_not_called()
+
+
+@pytest.mark.asyncio(loop_scope="function")
+async def test_cache_hit_skips_section_search(mocker, mock_file_service):
+    service = AIService()
+    service.client = mocker.Mock()
+    service.client.chat.completions.create = mocker.AsyncMock()
+    cached_suggestions = [{"id": 1, "section": "Install", "suggestion": "Update"}]
+    mock_cache = mocker.patch("app.ai_service.semantic_cache")
+    mock_cache.lookup.return_value = cached_suggestions
+
+    suggestions = await service.generate_doc_suggestions("update install docs")
+
+    assert suggestions == cached_suggestions
+    mock_cache.lookup.assert_called_once_with(mock_cache.embed.return_value, "v1")
+    mock_file_service.find_relevant_sections.assert_not_called()
+    service.client.chat.completions.create.assert_not_awaited()
+
+
+def test_enhance_suggestions_prefers_context_file_for_duplicate_title():
+    service = AIService()
+    relevant_sections = [
+        {"file_path": "cli.md", "section": {"title": "Installation"}},
+        {"file_path": "api.md", "section": {"title": "Installation"}},
+    ]
+    section_to_file = {"installation": "api.md", "usage": "api.md"}
+    suggestions = [
+        {"id": 1, "section": "Installation", "suggestion": "Update"},
+        {"id": 2, "section": "Usage", "suggestion": "Update"},
+    ]
+
+    service._enhance_suggestions_with_files(
+        suggestions, relevant_sections, section_to_file
+    )
+
+    assert [suggestion["file_path"] for suggestion in suggestions] == [
+        "cli.md",
+        "api.md",
+    ]
@@ -0,0 +1,19 @@
+import sys
+import types
+
+from app.embeddings import EmbeddingModel
+
+
+def test_model_load_failure_disables_embeddings(monkeypatch):
+    fake_module = types.ModuleType("sentence_transformers")
+
+    def fail_to_load(model_name):
+        raise OSError(f"Cannot download {model_name}")
+
+    fake_module.SentenceTransformer = fail_to_load
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_module)
+
+    model = EmbeddingModel("missing-model")
+
+    assert model.enabled is False
+    assert model.encode(["query"]) is None
@@ -0,0 +1,234 @@
+import hashlib
+
+import numpy as np
+import pytest
+from app.file_service import FileService
+
+
+@pytest.fixture
+def file_service(tmp_path, monkeypatch):
+    # Backups are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    docs_root = tmp_path / "docs"
+    docs_root.mkdir()
+    (docs_root / "guide.md").write_text(
+        "# Guide\n\nIntro text.\n\n## Install\n\nRun the installer.\n",
+        encoding="utf-8",
+    )
+    return FileService(str(docs_root))
+
+
+def test_find_relevant_sections(file_service):
+    results = file_service.find_relevant_sections("run installer")
+
+    assert [item["section"]["title"] for item in results] == ["Install"]
+    assert results[0]["file_path"] == "guide.md"
+    assert results[0]["relevance_score"] == 2
+
+
+def test_find_relevant_sections_reindexes_changed_file(file_service):
+    assert file_service.find_relevant_sections("upgrade") == []
+
+    (file_service.docs_root / "guide.md").write_text(
+        "# Guide\n\n## Upgrade\n\nRun the upgrade script.\n", encoding="utf-8"
+    )
+
+    results = file_service.find_relevant_sections("upgrade")
+
+    assert [item["section"]["title"] for item in results] == ["Upgrade"]
+    assert file_service.find_relevant_sections("installer") == []
+
+
+def test_unreadable_file_is_skipped_until_it_changes(file_service, capsys):
+    bad_path = file_service.docs_root / "bad.md"
+    bad_path.write_bytes(b"# Bad\n\xff\xfe\n")
+
+    file_service.find_relevant_sections("installer")
+    index = file_service._index
+    file_service.find_relevant_sections("installer")
+
+    assert file_service._index is index
+    assert capsys.readouterr().out.count("Error reading file") == 1
+
+    bad_path.write_text("# Fixed\n\nRun the installer.\n", encoding="utf-8")
+    results = file_service.find_relevant_sections("installer")
+
+    assert {item["file_path"] for item in results} == {"bad.md", "guide.md"}
+
+
+def test_create_backup_deduplicates_unchanged_file(file_service):
+    guide_path = file_service.docs_root / "guide.md"
+    original = guide_path.read_bytes()
+    digest = hashlib.sha256(original).hexdigest()
+
+    first_backup = file_service._create_backup(guide_path, original, digest)
+    second_backup = file_service._create_backup(guide_path, original, digest)
+
+    assert first_backup == second_backup
+    assert first_backup.read_bytes() == original
+    assert len(file_service.list_backups()) == 2
+
+
+def test_backup_index_skips_partial_line(file_service):
+    guide_path = file_service.docs_root / "guide.md"
+    original = guide_path.read_bytes()
+    digest = hashlib.sha256(original).hexdigest()
+    file_service._create_backup(guide_path, original, digest)
+    # Simulate a crash in the middle of appending the next entry
+    with file_service.backup_index_path.open("ab") as f:
+        f.write(b'{"created": "2024')
+
+    backups = file_service.list_backups()
+
+    assert [backup["hash"] for backup in backups] == [digest]
+
+
+def test_list_backups_includes_legacy_backups(file_service):
+    legacy_backup = file_service.backup_dir / "guide_20240101_120000.md"
+    legacy_backup.write_text("# Old guide\n", encoding="utf-8")
+    file_service.apply_suggestions(
+        [{"id": 1, "section": "Guide", "suggestion": "A", "file_path": "guide.md"}]
+    )
+
+    backups = file_service.list_backups()
+
+    assert len(backups) == 2
+    assert legacy_backup.name in {backup["name"] for backup in backups}
+
+
+def test_get_section_file_map(file_service):
+    assert file_service.get_section_file_map() == {
+        "guide": "guide.md",
+        "install": "guide.md",
+    }
+
+
+def test_get_section_file_map_duplicate_title_uses_first_path(file_service):
+    (file_service.docs_root / "api.md").write_text(
+        "# API\n\n## Install\n\nPip install.\n", encoding="utf-8"
+    )
+
+    # Pick up the new file
+    file_service.get_documentation_files()
+    section_file_map = file_service.get_section_file_map()
+
+    assert section_file_map["install"] == "api.md"
+    assert section_file_map["guide"] == "guide.md"
+
+
+def test_apply_suggestions_groups_by_file(file_service):
+    results = file_service.apply_suggestions(
+        [
+            {
+                "id": 1,
+                "section": "Guide",
+                "suggestion": "First",
+                "file_path": "guide.md",
+            },
+            {
+                "id": 2,
+                "section": "Install",
+                "suggestion": "Second",
+                "file_path": "guide.md",
+            },
+            {"id": 3, "section": "Other", "suggestion": "Third", "file_path": None},
+        ]
+    )
+
+    assert [item["suggestion_id"] for item in results["success"]] == [1, 2]
+    assert results["errors"] == [
+        {"suggestion_id": 3, "error": "No file path specified"}
+    ]
+    assert len(results["backups"]) == 1
+
+    content = (file_service.docs_root / "guide.md").read_text(encoding="utf-8")
+    assert "Suggestion: First" in content
+    assert "Suggestion: Second" in content
+
+
+def test_apply_suggestions_missing_file(file_service):
+    results = file_service.apply_suggestions(
+        [
+            {"id": 1, "section": "Guide", "suggestion": "A", "file_path": "gone.md"},
+            {"id": 2, "section": "Guide", "suggestion": "B", "file_path": "gone.md"},
+        ]
+    )
+
+    assert results["success"] == []
+    assert results["errors"] == [
+        {"suggestion_id": 1, "error": "File not found: gone.md"},
+        {"suggestion_id": 2, "error": "File not found: gone.md"},
+    ]
+    assert results["backups"] == []
+    assert file_service.list_backups() == []
+
+
+def test_reindex_encodes_only_changed_files(tmp_path, monkeypatch):
+    class FakeEmbeddingModel:
+        enabled = True
+
+        def __init__(self):
+            self.np = np
+            self.encoded = []
+
+        def encode(self, texts):
+            self.encoded.append(texts)
+            return np.ones((len(texts), 2), dtype=np.float32)
+
+    monkeypatch.chdir(tmp_path)
+    docs_root = tmp_path / "docs"
+    docs_root.mkdir()
+    (docs_root / "api.md").write_text("# API\n\nEndpoints.\n", encoding="utf-8")
+    (docs_root / "guide.md").write_text("# Guide\n\nIntro.\n", encoding="utf-8")
+    model = FakeEmbeddingModel()
+    service = FileService(str(docs_root), embedding_model=model)
+    service.get_section_file_map()
+
+    (docs_root / "guide.md").write_text(
+        "# Guide\n\nIntro.\n\n## Install\n\nSteps.\n", encoding="utf-8"
+    )
+    service.get_documentation_files()
+    service.get_section_file_map()
+
+    assert model.encoded == [
+        ["API\nEndpoints.", "Guide\nIntro."],
+        ["Guide\nIntro.", "Install\nSteps."],
+    ]
+    assert service._section_embeddings.shape == (3, 2)
+
+
+def test_similar_sections_below_min_similarity_are_dropped(tmp_path, monkeypatch):
+    class FakeEmbeddingModel:
+        enabled = True
+        np = np
+
+        def encode(self, texts):
+            return np.array(
+                [
+                    [1.0, 0.0] if text.startswith("Install") else [0.0, 1.0]
+                    for text in texts
+                ],
+                dtype=np.float32,
+            )
+
+    monkeypatch.chdir(tmp_path)
+    docs_root = tmp_path / "docs"
+    docs_root.mkdir()
+    (docs_root / "guide.md").write_text(
+        "# Guide\n\nIntro.\n\n## Install\n\nSteps.\n", encoding="utf-8"
+    )
+    service = FileService(
+        str(docs_root), embedding_model=FakeEmbeddingModel(), min_similarity=0.5
+    )
+
+    related = service.find_relevant_sections(
+        "install", np.array([0.9, 0.1], dtype=np.float32)
+    )
+    unrelated = service.find_relevant_sections(
+        "billing", np.array([-0.7, -0.7], dtype=np.float32)
+    )
+
+    assert [item["section"]["title"] for item in related] == ["Install"]
+    assert unrelated == []
+    # Embeddings rank the sections, so no keyword postings are built
+    assert service._index == {}
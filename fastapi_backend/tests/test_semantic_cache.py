@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.semantic_cache import SemanticCache
+
+
+class FakeEmbeddingModel:
+    """Stands in for sentence-transformers with fixed unit vectors."""
+
+    enabled = True
+    np = np
+
+    def encode(self, texts):
+        return np.array([[1.0, 0.0]] * len(texts), dtype=np.float32)
+
+
+def vector(x, y):
+    embedding = np.array([x, y], dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(
+        FakeEmbeddingModel(),
+        cache_path=str(tmp_path / "cache.pkl"),
+        threshold=0.9,
+        max_entries=2,
+    )
+
+
+def test_lookup_hits_similar_query(cache):
+    suggestions = [{"id": 1, "section": "Install", "suggestion": "Update"}]
+    cache.add(vector(1, 0), suggestions, "v1")
+
+    assert cache.lookup(vector(1, 0.1), "v1") == suggestions
+    assert cache.lookup(vector(0, 1), "v1") is None
+
+
+def test_docs_change_invalidates_entries(cache):
+    cache.add(vector(1, 0), [{"id": 1}], "v1")
+
+    assert cache.lookup(vector(1, 0), "v2") is None
+
+    cache.add(vector(0, 1), [{"id": 2}], "v2")
+
+    assert cache.entries == [[{"id": 2}]]
+    assert cache.lookup(vector(1, 0), "v2") is None
+
+
+def test_oldest_entries_are_evicted(cache):
+    cache.add(vector(1, 0), [{"id": 1}], "v1")
+    cache.add(vector(0, 1), [{"id": 2}], "v1")
+    cache.add(vector(-1, 0), [{"id": 3}], "v1")
+
+    assert cache.entries == [[{"id": 2}], [{"id": 3}]]
+    assert cache.embeddings.shape == (2, 2)
+    assert cache.lookup(vector(1, 0), "v1") is None
+
+
+def test_cache_persists_across_instances(cache):
+    cache.add(vector(1, 0), [{"id": 1}], "v1")
+
+    reloaded = SemanticCache(FakeEmbeddingModel(), cache_path=str(cache.cache_path))
+
+    assert reloaded.lookup(reloaded.embed("install docs"), "v1") == [{"id": 1}]